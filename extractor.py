@@ -0,0 +1,156 @@
+from ctypes import POINTER, byref, c_uint, c_void_p
+
+from clang.cindex import CursorKind, SourceLocation, conf
+
+_TYPEDEF = CursorKind.TYPEDEF_DECL
+_FUNCTION = CursorKind.FUNCTION_DECL
+_STRUCT = CursorKind.STRUCT_DECL
+_ENUM = CursorKind.ENUM_DECL
+_MACRO = CursorKind.MACRO_DEFINITION
+_FIELD = CursorKind.FIELD_DECL
+_ENUM_CONSTANT = CursorKind.ENUM_CONSTANT_DECL
+
+def _handle_typedef(node, add):
+    typedef_name = node.spelling
+
+    if typedef_name[:1] != '_':
+        typedef_type = node.underlying_typedef_type.spelling or 'none'
+
+        if not typedef_type.startswith('struct '):
+            add(f'typedef {typedef_type} {typedef_name};')
+
+def _handle_function(node, add):
+    func_name = node.spelling
+
+    if func_name[:1] != '_':
+        ret_type = node.result_type.spelling or 'none'
+        params = ', '.join(f'{param.type.spelling or "none"} {param.spelling or "none"}'
+                           for param in node.get_arguments())
+
+        add(f'{ret_type} {func_name}({params});')
+
+def _handle_struct(node, add):
+    struct_name = node.spelling
+
+    if struct_name and struct_name[:1] != '_':
+        parts = [f'struct {struct_name} {{\n']
+        append = parts.append
+
+        for struct_field in node.get_children():
+            if struct_field.kind is not _FIELD:
+                continue
+
+            field_type = struct_field.type.spelling or 'none'
+            field_name = struct_field.spelling or 'none'
+
+            append('    ')
+            append(field_type)
+            append(' ')
+            append(field_name)
+            append(';\n')
+
+        append('};')
+        add(''.join(parts))
+
+def _handle_enum(node, add):
+    enum_name = node.spelling
+
+    if enum_name and enum_name[:1] != '_':
+        values = []
+        append = values.append
+
+        for enum_value in node.get_children():
+            if enum_value.kind is not _ENUM_CONSTANT:
+                continue
+
+            enum_value_name = enum_value.spelling
+            enum_value_const = enum_value.enum_value
+
+            if enum_value_const is not None:
+                append(f'    {enum_value_name} = {enum_value_const}')
+            else:
+                append(f'    {enum_value_name}')
+
+        if values:
+            add(f'{enum_name} {{\n' + ',\n'.join(values) + '\n};')
+        else:
+            add(f'{enum_name} {{\n}};')
+
+def _handle_macro(node, add):
+    macro_name = node.spelling
+
+    if macro_name[:1] != '_':
+        tokens = node.get_tokens()
+        next(tokens, None)
+
+        macro_value = ' '.join(t.spelling for t in tokens)
+
+        if macro_value:
+            add(f'#define {macro_name} {macro_value}')
+        else:
+            add(f'#define {macro_name}')
+
+_EXPANSION_LOCATION = None
+
+def _get_expansion_location():
+    global _EXPANSION_LOCATION
+
+    if _EXPANSION_LOCATION is None:
+        func = conf.lib.clang_getExpansionLocation
+        func.argtypes = [SourceLocation, POINTER(c_void_p),
+                         POINTER(c_uint), POINTER(c_uint), POINTER(c_uint)]
+        func.restype = None
+        _EXPANSION_LOCATION = func
+
+    return _EXPANSION_LOCATION
+
+def _file_reader():
+    get_expansion_location = _get_expansion_location()
+    file = c_void_p()
+    file_ref = byref(file)
+
+    def file_handle(location):
+        get_expansion_location(location, file_ref, None, None, None)
+        return file.value
+
+    return file_handle
+
+def extract_defs(tu, decls=True, macros=True):
+    typedefs = []
+    functions = []
+    structs = []
+    enums = []
+    macro_defs = []
+
+    handlers = {}
+
+    if decls:
+        handlers[_TYPEDEF] = (_handle_typedef, typedefs.append)
+        handlers[_FUNCTION] = (_handle_function, functions.append)
+        handlers[_STRUCT] = (_handle_struct, structs.append)
+        handlers[_ENUM] = (_handle_enum, enums.append)
+
+    if macros:
+        handlers[_MACRO] = (_handle_macro, macro_defs.append)
+
+    get_handler = handlers.get
+    get_location = conf.lib.clang_getCursorLocation
+    file_handle = _file_reader()
+
+    header_files = {file_handle(tu.get_location(tu.spelling, 0))}
+
+    for node in tu.cursor.get_children():
+        handler = get_handler(node.kind)
+
+        if handler is None:
+            continue
+
+        node_file = file_handle(get_location(node))
+
+        if node_file is not None and node_file not in header_files:
+            continue
+
+        handle, add = handler
+        handle(node, add)
+
+    return typedefs, functions, structs, enums, macro_defs
@@ -1,9 +1,16 @@
+import os
 import sys
 from os import path
 import argparse
+from glob import glob
+from collections import Counter
+from contextlib import nullcontext
+from concurrent.futures import ProcessPoolExecutor
 
 import clang.cindex
-from clang.cindex import TranslationUnit, CursorKind
+from clang.cindex import TranslationUnit
+
+from extractor import extract_defs
 
 severity = {
     0: 'IGNORED',
@@ -30,151 +37,225 @@ def print_diagnostics(tu):
         else:
             print(message)
 
-    print('---\n')
+    print('---\n', flush=True)
 
-def clang_parse(header_path):
-    index = clang.cindex.Index.create()
-    tu = index.parse(header_path,
-                     options=TranslationUnit.PARSE_DETAILED_PROCESSING_RECORD)
-    print_diagnostics(tu)
+# CXTranslationUnit_CreatePreambleOnFirstParse, not exposed by clang.cindex
+PARSE_CREATE_PREAMBLE_ON_FIRST_PARSE = 0x100
 
-    return tu
+_INDEX = None
 
-def extract_defs(header_path, tu):
-    typedefs = []
-    functions = []
-    structs = []
-    enums = []
-    macros = []
+def get_index():
+    global _INDEX
 
-    for node in tu.cursor.get_children():
-        node_file = node.location.file
+    if _INDEX is None:
+        _INDEX = clang.cindex.Index.create()
 
-        if node_file is not None and path.abspath(node_file.name) != path.abspath(header_path):
-            continue
+    return _INDEX
 
-        if node.kind == CursorKind.TYPEDEF_DECL:
-            typedef_name = node.spelling
-            typedef_type = node.underlying_typedef_type.spelling or 'none'
+# Only paths listed more than once in header_paths are parsed with a
+# precompiled preamble and cached for reparsing; any other path is parsed
+# from scratch on every call.
+class HeaderParser:
+    clang_args = ['-x', 'c-header', '-fsyntax-only']
+    parse_options = (TranslationUnit.PARSE_SKIP_FUNCTION_BODIES |
+                     TranslationUnit.PARSE_INCOMPLETE)
+    preamble_options = (TranslationUnit.PARSE_PRECOMPILED_PREAMBLE |
+                        PARSE_CREATE_PREAMBLE_ON_FIRST_PARSE)
 
-            if not typedef_name.startswith('_') and not typedef_type.startswith('struct '):
-                typedefs.append(f'typedef {typedef_type} {typedef_name};')
+    def __init__(self, decls=True, macros=True, header_paths=()):
+        self.index = get_index()
+        self.decls = decls
+        self.macros = macros
+        self._uses = Counter(path.abspath(header_path) for header_path in header_paths)
+        self._tu_cache = {}
 
-        elif node.kind == CursorKind.FUNCTION_DECL:
-            func_name = node.spelling
+        if macros:
+            self.parse_options |= TranslationUnit.PARSE_DETAILED_PROCESSING_RECORD
 
-            if not func_name.startswith('_'):
-                ret_type = node.result_type.spelling or 'none'
-                params = []
+    def parse(self, header_path):
+        key = path.abspath(header_path)
+        uses = self._uses.get(key, 0)
+        tu = self._tu_cache.pop(key, None)
 
-                for param in node.get_arguments():
-                    param_type = param.type.spelling or 'none'
-                    param_name = param.spelling or 'none'
-                    params.append(f'{param_type} {param_name}')
+        if tu is not None:
+            tu.reparse(unsaved_files=[])
+        else:
+            options = self.parse_options
 
-                functions.append(f'{ret_type} {func_name}({', '.join(params)});')
+            if uses > 1:
+                options |= self.preamble_options
 
-        elif node.kind == CursorKind.STRUCT_DECL:
-            struct_name = node.spelling
+            tu = self.index.parse(header_path,
+                                  args=self.clang_args,
+                                  options=options)
 
-            if not struct_name.startswith('_'):
-                struct_def = f'struct {struct_name} {{\n'
+        if uses:
+            self._uses[key] = uses - 1
 
-                for struct_field in node.get_children():
-                    if struct_field.kind == CursorKind.FIELD_DECL:
-                        field_type = struct_field.type.spelling or 'none'
-                        field_name = struct_field.spelling or 'none'
-                        struct_def += f'    {field_type} {field_name};\n'
+        if uses > 1:
+            self._tu_cache[key] = tu
 
-                struct_def += '};'
-                structs.append(struct_def)
+        print_diagnostics(tu)
 
-        elif node.kind == CursorKind.ENUM_DECL:
-            enum_name = node.spelling
+        return tu
 
-            if not enum_name.startswith('_'):
-                enum_def = f'{enum_name} {{\n'
+def write_header(header_path, header_parser, out):
+    if not path.isfile(header_path):
+        raise FileNotFoundError(f"File '{header_path}' not found")
 
-                for enum_value in node.get_children():
-                    if enum_value.kind == CursorKind.ENUM_CONSTANT_DECL:
-                        enum_value_name = enum_value.spelling
-                        enum_value_const = enum_value.enum_value
+    tu = header_parser.parse(header_path)
+    typedefs, functions, structs, enums, macros = extract_defs(tu,
+                                                               decls=header_parser.decls,
+                                                               macros=header_parser.macros)
 
-                        if enum_value_const is not None:
-                            enum_def += f'    {enum_value_name} = {enum_value_const},\n'
-                        else:
-                            enum_def += f'    {enum_value_name},\n'
+    sections = []
 
-                enum_def = enum_def.rstrip(',\n') + '\n};'
-                enums.append(enum_def)
+    if header_parser.decls:
+        sections.extend([
+            ('Typedefs', typedefs),
+            ('Functions', functions),
+            ('Structs', structs),
+            ('Enums', enums),
+        ])
 
-        elif node.kind == CursorKind.MACRO_DEFINITION:
-            macro_name = node.spelling
+    if header_parser.macros:
+        sections.append(('Macros', macros))
 
-            if not macro_name.startswith('_'):
-                tokens = [t.spelling for t in node.get_tokens()]
+    for title, items in sections:
+        out.write(f'{title}:\n---\n'.encode())
 
-                macro_value = ' '.join(tokens[1:]) if len(tokens) > 1 else ''
-                macros.append(f'#define {macro_name} {macro_value}'.strip())
+        for item in items:
+            out.write(item.encode())
+            out.write(b'\n')
 
-    return typedefs, functions, structs, enums, macros
+        out.write(b'---\n\n')
 
-def process_header(header_path):
-    if not path.isfile(header_path):
-        print(f"ERROR: File '{header_path}' not found", file=sys.stderr)
-        sys.exit(1)
+def parse_args():
+    parser = argparse.ArgumentParser(description='Parse C header for definitions')
+    parser.add_argument('header', nargs='?', help='C header path')
+    parser.add_argument('--batch', help='File listing header paths to parse, one per line (optional)', default=None)
+    parser.add_argument('--input-dir', help='Directory of headers to parse, one output file per header (optional)', default=None)
+    parser.add_argument('--glob', help="Header file pattern used with --input-dir (default: '*.h')", default=None)
+    parser.add_argument('--jobs', help='Number of worker processes used with --input-dir (optional)', type=int, default=None)
+    macro_group = parser.add_mutually_exclusive_group()
+    macro_group.add_argument('--no-macros', help='Skip macro definitions (faster, uses less memory)', action='store_true')
+    macro_group.add_argument('--macros-only', help='Only extract macro definitions', action='store_true')
+    parser.add_argument('--clang-path', help='Custom path to the Clang library (optional)', default=None)
+    parser.add_argument('--out', help='Output file path, or output directory with --input-dir (optional)', default=None)
 
-    tu = clang_parse(header_path)
-    typedefs, functions, structs, enums, macros = extract_defs(header_path, tu)
+    args = parser.parse_args()
 
-    sections = [
-        ('Typedefs', typedefs),
-        ('Functions', functions),
-        ('Structs', structs),
-        ('Enums', enums),
-        ('Macros', macros),
-    ]
-    output = []
+    if args.input_dir is not None:
+        if args.header is not None or args.batch is not None:
+            parser.error('--input-dir cannot be combined with a header path or --batch')
+        if args.jobs is not None and args.jobs < 1:
+            parser.error('--jobs must be at least 1')
+    elif args.glob is not None or args.jobs is not None:
+        parser.error('--glob and --jobs can only be used with --input-dir')
+    elif args.header is None and args.batch is None:
+        parser.error('a header path, --batch or --input-dir is required')
 
-    for title, items in sections:
-        output.append(f'{title}:\n---')
-        output.extend(items)
-        output.append('---\n')
+    return args
 
-    return '\n'.join(output)
+def read_batch(batch_path):
+    with open(batch_path) as f:
+        return [line.strip() for line in f if line.strip()]
 
-def parse_args():
-    parser = argparse.ArgumentParser(description='Parse C header for definitions')
-    parser.add_argument('header', help='C header path')
-    parser.add_argument('--clang-path', help='Custom path to the Clang library (optional)', default=None)
-    parser.add_argument('--out', help='Output file path (optional)', default=None)
+def open_output(out_path):
+    if out_path:
+        return open(out_path, 'wb')
+
+    return nullcontext(sys.stdout.buffer)
+
+def set_clang_path(clang_path):
+    if path.isfile(clang_path):
+        clang.cindex.Config.set_library_file(clang_path)
+    else:
+        clang.cindex.Config.set_library_path(clang_path)
+
+_worker_parser = None
+
+def _init_worker(clang_path, decls, macros):
+    global _worker_parser
+
+    if clang_path and not clang.cindex.Config.loaded:
+        set_clang_path(clang_path)
 
-    return parser.parse_args()
+    _worker_parser = HeaderParser(decls=decls, macros=macros)
+
+def _write_header_file(header_path, out_path):
+    with open(out_path, 'wb') as out:
+        write_header(header_path, _worker_parser, out)
+
+def process_dir(input_dir, pattern, out_dir, jobs, clang_path, decls, macros):
+    if not path.isdir(input_dir):
+        raise FileNotFoundError(f"Directory '{input_dir}' not found")
+
+    headers = [path.join(input_dir, header_name)
+               for header_name in sorted(glob(pattern, root_dir=input_dir))]
+    headers = [header_path for header_path in headers if path.isfile(header_path)]
+
+    if not headers:
+        raise FileNotFoundError(f"No headers matching '{pattern}' found in '{input_dir}'")
+
+    out_paths = [path.join(out_dir, path.basename(header_path) + '.txt')
+                 for header_path in headers]
+
+    if len(set(out_paths)) != len(out_paths):
+        raise ValueError('--glob matched several headers with the same file name')
+
+    os.makedirs(out_dir, exist_ok=True)
+
+    with ProcessPoolExecutor(max_workers=jobs,
+                             initializer=_init_worker,
+                             initargs=(clang_path, decls, macros)) as executor:
+        for _ in executor.map(_write_header_file, headers, out_paths):
+            pass
 
 def main():
     args = parse_args()
 
     try:
         if args.clang_path:
-            if path.isfile(args.clang_path):
-                clang.cindex.Config.set_library_file(args.clang_path)
-            else:
-                clang.cindex.Config.set_library_path(args.clang_path)
+            set_clang_path(args.clang_path)
     except clang.cindex.LibclangError as err:
         print(f'ERROR: Failed to load libclang: {err}', file=sys.stderr)
         print('Try setting --clang-path to the folder or full path of the libclang shared library.')
         sys.exit(1)
+
+    decls = not args.macros_only
+    macros = not args.no_macros
+
+    if args.input_dir:
+        try:
+            process_dir(args.input_dir, args.glob or '*.h', args.out or '.', args.jobs, args.clang_path,
+                        decls, macros)
+        except Exception as err:
+            print(f'ERROR: {err}', file=sys.stderr)
+            sys.exit(1)
+
+        return
+
     try:
-        output = process_header(args.header)
+        headers = [args.header] if args.header else []
+        if args.batch:
+            headers.extend(read_batch(args.batch))
+
+        for header_path in headers:
+            if not path.isfile(header_path):
+                raise FileNotFoundError(f"File '{header_path}' not found")
+
+        header_parser = HeaderParser(decls=decls, macros=macros, header_paths=headers)
+
+        with open_output(args.out) as out:
+            for header_path in headers:
+                if len(headers) > 1:
+                    out.write(f'{header_path}:\n===\n'.encode())
+
+                write_header(header_path, header_parser, out)
     except Exception as err:
         print(f'ERROR: {err}', file=sys.stderr)
         sys.exit(1)
 
-    if args.out:
-        with open(args.out, 'w') as f:
-            f.write(output)
-    else:
-        print(output)
-
 if __name__ == '__main__':
     main()
\ No newline at end of file
@@ -0,0 +1,10 @@
+from setuptools import setup
+from Cython.Build import cythonize
+
+setup(
+    name='header-parser',
+    ext_modules=cythonize(
+        ['extractor.py'],
+        compiler_directives={'language_level': 3, 'boundscheck': False},
+    ),
+)